@@ -40,7 +40,9 @@ if [ ! -f /etc/liquidctl-monitor/config.json ]; then
 {
     "monitoring": {
         "interval": 2.0,
-        "history_size": 10,
+        "max_interval": 10.0,
+        "stable_delta": 0.5,
+        "stable_iterations": 3,
         "smoothing_factor": 0.2
     },
     "fan_curve": {
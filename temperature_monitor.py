@@ -6,35 +6,183 @@ Monitors CPU, GPU, and coolant temperatures and adjusts fan/pump speeds accordin
 
 import time
 import json
+import bisect
+import math
+import re
+import functools
 import logging
+import logging.handlers
+import atexit
 import signal
 import sys
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 import subprocess
-import psutil
 from py3nvml.py3nvml import nvmlInit, nvmlShutdown, nvmlDeviceGetHandleByIndex, nvmlDeviceGetTemperature, NVML_TEMPERATURE_GPU
 import liquidctl
 import liquidctl.cli
 
+# liquidctl (major, minor) releases whose Aquacomputer control report layout was checked
+# against the batched Quadro write; other versions write channel by channel
+_BATCHED_QUADRO_LIQUIDCTL_VERSIONS = ((1, 16),)
+
+def _liquidctl_version() -> Optional[Tuple[int, int]]:
+    """Installed liquidctl (major, minor) version, or None if it can't be determined"""
+    match = re.match(r'(\d+)\.(\d+)', getattr(liquidctl, '__version__', ''))
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+def _crc16_usb(data: bytes) -> int:
+    """CRC-16/USB checksum used by Aquacomputer control reports"""
+    crc = 0xFFFF
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+    return crc ^ 0xFFFF
+
+class SysfsInt:
+    """Integer sysfs attribute kept open and re-read with pread"""
+    
+    def __init__(self, path: Path):
+        self.path = path
+        self._fd = os.open(path, os.O_RDONLY)
+    
+    def read(self) -> int:
+        """Read the current value; offset 0 makes sysfs regenerate it"""
+        return int(os.pread(self._fd, 32, 0))
+    
+    def close(self):
+        """Close the file descriptor"""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+# Duty changes (%) this small are not written, unless they reach the curve's min/max duty
+_DUTY_HYSTERESIS = 1
+# Seconds after which all duties are re-sent, in case a device reset or reverted its settings
+_DUTY_REFRESH_INTERVAL = 300.0
+
+# Consecutive errors after which a sensor/actuator call is skipped, and for how long (seconds)
+_MAX_CONSECUTIVE_FAILURES = 5
+_FAILURE_RETRY_DELAY = 60.0
+
+def _safe(name: str, action: str, log_level: int = logging.ERROR, default=None, backoff: bool = True):
+    """Log and swallow errors from a sensor/actuator method
+    
+    With backoff, the method is skipped for a while after repeated failures. Actuators
+    disable it so a pump or fan command is retried on every tick.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            if self._disabled_until.get(name, 0.0) > time.monotonic():
+                return default
+            try:
+                result = fn(self, *args, **kwargs)
+            except Exception as e:
+                failures = self._failures.get(name, 0) + 1
+                self._failures[name] = failures
+                self.logger.log(log_level, "Error %s: %s", action, e)
+                if backoff and failures >= _MAX_CONSECUTIVE_FAILURES:
+                    self._disabled_until[name] = time.monotonic() + _FAILURE_RETRY_DELAY
+                    self.logger.log(
+                        log_level, "Skipping %s for %.0fs after %d consecutive errors",
+                        name, _FAILURE_RETRY_DELAY, failures
+                    )
+                return default
+            if name in self._failures:
+                del self._failures[name]
+            return result
+        return wrapper
+    return decorator
+
+def _ema(previous: float, new: float, alpha: float, one_minus_alpha: float) -> float:
+    """Exponential smoothing: smoothed = α * new + (1-α) * previous"""
+    return alpha * new + one_minus_alpha * previous
+
+def _interpolate(temperature: float, temps: Tuple[float, ...], duties: Tuple[float, ...]) -> int:
+    """Linearly interpolate a duty from parallel, temperature-sorted curve points"""
+    # If temperature is below the lowest point, return minimum duty
+    if temperature <= temps[0]:
+        return int(duties[0])
+    
+    # If temperature is above the highest point, return maximum duty
+    if temperature >= temps[-1]:
+        return int(duties[-1])
+    
+    # Find the two points to interpolate between
+    i = bisect.bisect_right(temps, temperature)
+    ratio = (temperature - temps[i - 1]) / (temps[i] - temps[i - 1])
+    duty = duties[i - 1] + ratio * (duties[i] - duties[i - 1])
+    return int(max(0, min(100, duty)))  # Clamp to 0-100%
+
 class TemperatureMonitor:
+    SENSORS = ('cpu', 'gpu', 'coolant', 'motherboard')
+    # Curve driving each fan/pump channel
+    CHANNEL_CURVES = {'fan1': 'radiator', 'fan2': 'radiator', 'fan3': 'motherboard', 'pump': 'pump'}
+    
     def __init__(self, config_path: str = "/etc/liquidctl-monitor/config.json"):
         self.config_path = config_path
         self.config = self.load_config()
         self.running = True
-        self.sensor_history = {
-            'cpu': [],
-            'gpu': [],
-            'coolant': [],
-            'motherboard': []
-        }
+        # Last smoothed value per sensor, ordered like SENSORS (None until the first reading)
+        self._smoothed: List[Optional[float]] = [None] * len(self.SENSORS)
+        # Smoothing coefficients per sensor; lower = more smoothing, and highly
+        # variable sensors (CPU/GPU) get a smaller factor for even more smoothing
+        smoothing_factor = self.config["monitoring"]["smoothing_factor"]
+        self._alpha = tuple(
+            smoothing_factor * 0.5 if sensor_type in ('cpu', 'gpu') else smoothing_factor
+            for sensor_type in self.SENSORS
+        )
+        self._one_minus_alpha = tuple(1 - alpha for alpha in self._alpha)
         self.nvidia_handle = None
+        self._nvml_get_temp = None
         self.quadro_device = None
         self.d5_device = None
         
+        # Sensor files, resolved and opened on first use and re-read every iteration
+        self._tccd_inputs: Optional[List[SysfsInt]] = None
+        self._mb_inputs: Optional[List[SysfsInt]] = None
+        # Whether the sensors command fallback is worth running (None until its first run)
+        self._sensors_fallback: Optional[bool] = None
+        self._coretemp_inputs: Optional[List[SysfsInt]] = None
+        
+        # Thermal zones are enumerated once and shared by the CPU and motherboard fallbacks
+        thermal_zones = self._find_thermal_zones()
+        self._cpu_zone_temps = self._open_sensors([
+            zone / "temp" for zone, zone_type in thermal_zones
+            if "cpu" in zone_type or "core" in zone_type
+        ])
+        self._mb_zone_temps = self._open_sensors([
+            zone / "temp" for zone, zone_type in thermal_zones
+            if any(keyword in zone_type for keyword in ['chipset', 'motherboard', 'system', 'pch'])
+        ])
+        
+        # Last duty written to each channel, and when the last USB write happened
+        self._last_duty = {'fan1': None, 'fan2': None, 'fan3': None, 'pump': None}
+        self._last_write_time = 0.0
+        self._last_duty_refresh = time.monotonic()
+        
+        # Adaptive polling state: previous smoothed readings and stable reading count
+        self._current_interval = self.config["monitoring"]["interval"]
+        self._previous_temps: Optional[Tuple[Optional[float], ...]] = None
+        self._stable_iterations = 0
+        
+        # Consecutive error counts and retry deadlines for sensors/actuators (see _safe)
+        self._failures: Dict[str, int] = {}
+        self._disabled_until: Dict[str, float] = {}
+        
+        # Worker threads for concurrent sensor reads; liquidctl device access is
+        # serialized on a lock since it is not safe across concurrent callers
+        self._pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="sensor")
+        self._usb_lock = threading.Lock()
+        
         # Setup logging
         self.setup_logging()
+        self.load_curves()
         
         # Initialize hardware
         self.init_nvidia()
@@ -49,7 +197,9 @@ class TemperatureMonitor:
         default_config = {
             "monitoring": {
                 "interval": 2.0,
-                "history_size": 10,
+                "max_interval": 10.0,  # Upper bound for the interval while temperatures are stable
+                "stable_delta": 0.5,  # Max change (°C) per reading that still counts as stable
+                "stable_iterations": 3,  # Stable readings in a row before the interval is doubled
                 "smoothing_factor": 0.2  # Lower = more smoothing, especially important for CPU/GPU
             },
             "fan_curve": {
@@ -79,6 +229,9 @@ class TemperatureMonitor:
                 for key, value in default_config.items():
                     if key not in config:
                         config[key] = value
+                    elif isinstance(value, dict):
+                        for subkey, subvalue in value.items():
+                            config[key].setdefault(subkey, subvalue)
                 return config
             except Exception as e:
                 print(f"Error loading config: {e}, using defaults")
@@ -90,16 +243,68 @@ class TemperatureMonitor:
                 json.dump(default_config, f, indent=4)
             return default_config
     
+    def load_curves(self):
+        """Validate fan/pump curve profiles once and precompute their duty lookup tables"""
+        profiles = {
+            'radiator': self.config["fan_curve"]["radiator_profile"],
+            'motherboard': self.config["fan_curve"]["motherboard_profile"],
+            'pump': self.config["pump_curve"]["profile"]
+        }
+        self._curves = {}
+        for name, profile in profiles.items():
+            # Profile format: [temp1, duty1, temp2, duty2, ...]
+            valid = (
+                isinstance(profile, list) and len(profile) >= 4 and len(profile) % 2 == 0
+                and all(
+                    isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+                    for value in profile
+                )
+            )
+            if not valid:
+                self.logger.error(f"Invalid {name} profile format: {profile}")
+                profile = [0, 50]  # Safe fallback
+            
+            # Sort (temp, duty) pairs by temperature and split them into parallel tuples
+            points = sorted(zip(profile[0::2], profile[1::2]), key=lambda x: x[0])
+            self._curves[name] = (
+                tuple(float(temp) for temp, _ in points),
+                tuple(float(duty) for _, duty in points)
+            )
+        
+        # Dense duty tables indexed by tenths of a degree (0.0-110.0°C), one byte per entry
+        self._curve_tables = {
+            name: bytes(
+                max(0, min(100, self.interpolate_curve(name, decidegrees / 10.0)))
+                for decidegrees in range(1101)
+            )
+            for name in profiles
+        }
+        self._curve_limits = {name: (min(table), max(table)) for name, table in self._curve_tables.items()}
+    
+    def curve_duty(self, name: str, temperature: float) -> int:
+        """Look up fan/pump speed from a precomputed curve table at 0.1°C resolution"""
+        return self._curve_tables[name][min(1100, max(0, int(temperature * 10)))]
+    
     def setup_logging(self):
         """Setup logging configuration"""
         log_dir = Path("/var/log/liquidctl-monitor")
         log_dir.mkdir(exist_ok=True)
         
+        log_format = '%(asctime)s - %(levelname)s - %(message)s'
+        
+        # Buffer file writes; the buffer is flushed when full, on ERROR and at shutdown
+        file_handler = logging.FileHandler(log_dir / "monitor.log")
+        file_handler.setFormatter(logging.Formatter(log_format))
+        self._file_log_buffer = logging.handlers.MemoryHandler(
+            capacity=256, flushLevel=logging.ERROR, target=file_handler
+        )
+        atexit.register(self._file_log_buffer.flush)
+        
         logging.basicConfig(
             level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
+            format=log_format,
             handlers=[
-                logging.FileHandler(log_dir / "monitor.log"),
+                self._file_log_buffer,
                 logging.StreamHandler(sys.stdout)
             ]
         )
@@ -110,10 +315,15 @@ class TemperatureMonitor:
         try:
             nvmlInit()
             self.nvidia_handle = nvmlDeviceGetHandleByIndex(0)
+            # Bind the handle and sensor once so each reading is a single call
+            self._nvml_get_temp = functools.partial(
+                nvmlDeviceGetTemperature, self.nvidia_handle, NVML_TEMPERATURE_GPU
+            )
             self.logger.info("NVIDIA GPU monitoring initialized")
         except Exception as e:
             self.logger.error(f"Failed to initialize NVIDIA monitoring: {e}")
             self.nvidia_handle = None
+            self._nvml_get_temp = None
     
     def init_liquidctl(self):
         """Initialize liquidctl devices (Quadro and D5 Next)"""
@@ -137,6 +347,11 @@ class TemperatureMonitor:
                     if "quadro" in device.description.lower():
                         self.quadro_device = device
                         self.logger.info(f"Quadro device found: {device.description}")
+                        if _liquidctl_version() not in _BATCHED_QUADRO_LIQUIDCTL_VERSIONS:
+                            self.logger.info(
+                                "liquidctl %s not verified for batched Quadro writes, writing fans one by one",
+                                getattr(liquidctl, '__version__', 'unknown')
+                            )
                     
                     # Check if it's a D5 Next
                     elif "d5" in device.description.lower() or "next" in device.description.lower():
@@ -161,243 +376,358 @@ class TemperatureMonitor:
             self.quadro_device = None
             self.d5_device = None
     
-    def get_cpu_temperature(self) -> Optional[float]:
-        """Get CPU temperature from thermal sensors"""
+    def _open_sensors(self, paths: List[Path]) -> List[SysfsInt]:
+        """Open sensor files for repeated reads, skipping any that can't be opened"""
+        sensors = []
+        for path in paths:
+            try:
+                sensors.append(SysfsInt(path))
+            except OSError:
+                continue
+        return sensors
+    
+    def _close_sensors(self):
+        """Close all kept-open sensor files"""
+        for sensors in (self._tccd_inputs, self._cpu_zone_temps, self._mb_inputs,
+                        self._coretemp_inputs, self._mb_zone_temps):
+            for sensor in sensors or []:
+                sensor.close()
+    
+    def _read_hwmon_int(self, sensor: SysfsInt) -> Optional[int]:
+        """Read an integer value from a sysfs sensor file, or None if it can't be read"""
         try:
-            # Read Tccd die temperatures directly from hwmon (k10temp driver)
-            # Tccd values are actual die temps; Tctl includes an AMD offset and is excluded
-            tccd_temps = []
-            for hwmon_dir in Path("/sys/class/hwmon").glob("hwmon*"):
-                try:
-                    if (hwmon_dir / "name").read_text().strip() != "k10temp":
-                        continue
-                    for label_file in hwmon_dir.glob("temp*_label"):
-                        if label_file.read_text().strip().startswith("Tccd"):
-                            input_file = label_file.with_name(
-                                label_file.name.replace("_label", "_input")
-                            )
-                            temp = float(input_file.read_text().strip()) / 1000.0
-                            if 20 <= temp <= 100:
-                                tccd_temps.append(temp)
-                except OSError:
+            return sensor.read()
+        except (OSError, ValueError):
+            return None
+    
+    def _read_temperatures(self, sensors: List[SysfsInt]) -> List[float]:
+        """Read millidegree sensor files in °C, skipping any that can't be read"""
+        temps = []
+        for sensor in sensors:
+            value = self._read_hwmon_int(sensor)
+            if value is not None:
+                temps.append(value / 1000.0)
+        return temps
+    
+    def _find_tccd_input_paths(self) -> List[Path]:
+        """Locate Tccd input files exposed by the k10temp hwmon driver"""
+        # Tccd values are actual die temps; Tctl includes an AMD offset and is excluded
+        input_paths = []
+        for hwmon_dir in Path("/sys/class/hwmon").glob("hwmon*"):
+            try:
+                if (hwmon_dir / "name").read_text().strip() != "k10temp":
                     continue
-            if tccd_temps:
-                return max(tccd_temps)
-            
-            # Fallback to thermal zones
-            thermal_zones = []
-            for zone in Path("/sys/class/thermal").glob("thermal_zone*"):
-                try:
-                    with open(zone / "type") as f:
-                        zone_type = f.read().strip()
-                    if "cpu" in zone_type.lower() or "core" in zone_type.lower():
-                        with open(zone / "temp") as f:
-                            temp = float(f.read().strip()) / 1000.0
-                            thermal_zones.append(temp)
-                except:
+                for label_file in hwmon_dir.glob("temp*_label"):
+                    if label_file.read_text().strip().startswith("Tccd"):
+                        input_paths.append(label_file.with_name(
+                            label_file.name.replace("_label", "_input")
+                        ))
+            except OSError:
+                continue
+        return input_paths
+    
+    def _find_thermal_zones(self) -> List[Tuple[Path, str]]:
+        """Enumerate thermal zones as (path, lowercase type) pairs"""
+        zones = []
+        for zone in Path("/sys/class/thermal").glob("thermal_zone*"):
+            try:
+                zones.append((zone, (zone / "type").read_text().strip().lower()))
+            except OSError:
+                continue
+        return zones
+    
+    def _find_coretemp_paths(self) -> List[Path]:
+        """Locate input files exposed by the coretemp hwmon driver"""
+        input_paths = []
+        for hwmon_dir in Path("/sys/class/hwmon").glob("hwmon*"):
+            try:
+                if (hwmon_dir / "name").read_text().strip() != "coretemp":
                     continue
-            
-            if thermal_zones:
-                return max(thermal_zones)  # Return highest CPU temp
-            else:
-                # Fallback to psutil
-                temps = psutil.sensors_temperatures()
-                if 'coretemp' in temps:
-                    return max([temp.current for temp in temps['coretemp']])
-                return None
-        except Exception as e:
-            self.logger.error(f"Error getting CPU temperature: {e}")
-            return None
+                input_paths.extend(sorted(hwmon_dir.glob("temp*_input")))
+            except OSError:
+                continue
+        return input_paths
+    
+    @_safe('cpu', "getting CPU temperature")
+    def get_cpu_temperature(self) -> Optional[float]:
+        """Get CPU temperature from thermal sensors"""
+        # Read Tccd die temperatures directly from hwmon (k10temp driver)
+        if self._tccd_inputs is None:
+            self._tccd_inputs = self._open_sensors(self._find_tccd_input_paths())
+        tccd_temps = [temp for temp in self._read_temperatures(self._tccd_inputs) if 20 <= temp <= 100]
+        if tccd_temps:
+            return max(tccd_temps)
+        
+        # Fallback to thermal zones
+        thermal_zones = self._read_temperatures(self._cpu_zone_temps)
+        if thermal_zones:
+            return max(thermal_zones)  # Return highest CPU temp
+        
+        # Fallback to coretemp (Intel) hwmon inputs
+        if self._coretemp_inputs is None:
+            self._coretemp_inputs = self._open_sensors(self._find_coretemp_paths())
+        core_temps = self._read_temperatures(self._coretemp_inputs)
+        if core_temps:
+            return max(core_temps)
+        return None
     
+    @_safe('gpu', "getting GPU temperature")
     def get_gpu_temperature(self) -> Optional[float]:
         """Get GPU temperature from NVIDIA"""
-        if not self.nvidia_handle:
+        if not self._nvml_get_temp:
             return None
         
-        try:
-            temp = nvmlDeviceGetTemperature(self.nvidia_handle, NVML_TEMPERATURE_GPU)
-            return float(temp)
-        except Exception as e:
-            self.logger.error(f"Error getting GPU temperature: {e}")
-            return None
+        return float(self._nvml_get_temp())
     
+    @_safe('coolant', "getting coolant temperature")
     def get_coolant_temperature(self) -> Optional[float]:
         """Get coolant temperature from D5 Next device"""
         if not self.d5_device:
             return None
         
-        try:
+        with self._usb_lock:
             status = self.d5_device.get_status()
-            for key, value, unit in status:
-                if "temperature" in key.lower() and unit == "°C":
-                    return float(value)
-            return None
-        except Exception as e:
-            self.logger.error(f"Error getting coolant temperature: {e}")
-            return None
+        for key, value, unit in status:
+            if "temperature" in key.lower() and unit == "°C":
+                return float(value)
+        return None
     
-    def get_motherboard_temperature(self) -> Optional[float]:
-        """Get motherboard/chipset temperature from sensors"""
-        try:
-            # Try to get temperature from sensors command
-            result = subprocess.run(['sensors', '-A'], capture_output=True, text=True, timeout=5)
-            if result.returncode == 0:
-                lines = result.stdout.split('\n')
-                temperatures = []
-                
-                for line in lines:
-                    # Look for network card temperatures (PHY/MAC) or WiFi controller
-                    if any(keyword in line for keyword in ['PHY Temperature:', 'MAC Temperature:', 'temp1:']):
-                        # Extract temperature from line like "PHY Temperature:  +57.8°C"
-                        if '°C' in line:
-                            parts = line.split('°C')[0].split()
-                            for part in reversed(parts):
-                                try:
-                                    temp = float(part.replace('+', '').replace('*', ''))
-                                    if 20 <= temp <= 100:  # Reasonable temperature range
-                                        temperatures.append(temp)
-                                        break
-                                except ValueError:
-                                    continue
-                
-                if temperatures:
-                    return max(temperatures)  # Return highest temperature as motherboard temp
-            
-            # Fallback to thermal zones
-            for zone in Path("/sys/class/thermal").glob("thermal_zone*"):
-                try:
-                    with open(zone / "type") as f:
-                        zone_type = f.read().strip()
-                    if any(keyword in zone_type.lower() for keyword in ['chipset', 'motherboard', 'system', 'pch']):
-                        with open(zone / "temp") as f:
-                            temp = float(f.read().strip()) / 1000.0
-                            return temp
-                except:
+    def _find_motherboard_input_paths(self) -> List[Path]:
+        """Locate hwmon input files for network controller (PHY/MAC) and unlabeled temp1 sensors"""
+        # Matches the sensors that `sensors -A` reports as "PHY Temperature",
+        # "MAC Temperature" or "temp1" (temp1 without a label file)
+        input_paths = []
+        for hwmon_dir in Path("/sys/class/hwmon").glob("hwmon*"):
+            try:
+                for input_file in hwmon_dir.glob("temp*_input"):
+                    label_file = input_file.with_name(input_file.name.replace("_input", "_label"))
+                    if label_file.exists():
+                        label = label_file.read_text().strip()
+                    else:
+                        label = input_file.name.replace("_input", "")
+                    if label in ('PHY Temperature', 'MAC Temperature', 'temp1'):
+                        input_paths.append(input_file)
+            except OSError:
+                continue
+        return input_paths
+    
+    def _read_sensors_command(self) -> List[float]:
+        """Read network card (PHY/MAC) and temp1 temperatures from the sensors command"""
+        temperatures = []
+        result = subprocess.run(['sensors', '-j', '-A'], capture_output=True, text=True, timeout=5)
+        if result.returncode == 0:
+            # JSON layout: {chip: {feature label: {"temp1_input": 57.8, ...}, ...}, ...}
+            try:
+                chips = json.loads(result.stdout)
+            except ValueError:
+                chips = {}  # Malformed output, fall through to thermal zones
+            if not isinstance(chips, dict):
+                chips = {}
+            for features in chips.values():
+                if not isinstance(features, dict):
                     continue
-            
-            return None
-        except Exception as e:
-            self.logger.error(f"Error getting motherboard temperature: {e}")
-            return None
+                for label, subfeatures in features.items():
+                    # Look for network card temperatures (PHY/MAC) or WiFi controller
+                    if label not in ('PHY Temperature', 'MAC Temperature', 'temp1') or not isinstance(subfeatures, dict):
+                        continue
+                    for subfeature, value in subfeatures.items():
+                        if subfeature.endswith('_input') and isinstance(value, (int, float)):
+                            if 20 <= value <= 100:  # Reasonable temperature range
+                                temperatures.append(float(value))
+        return temperatures
     
-    def smooth_temperature(self, sensor_type: str, new_temp: float) -> float:
-        """Apply exponential smoothing to temperature readings"""
-        history = self.sensor_history[sensor_type]
-        smoothing_factor = self.config["monitoring"]["smoothing_factor"]
+    @_safe('motherboard', "getting motherboard temperature")
+    def get_motherboard_temperature(self) -> Optional[float]:
+        """Get motherboard/chipset temperature from sensors"""
+        # Read network card temperatures (PHY/MAC) or WiFi controller directly from hwmon
+        if self._mb_inputs is None:
+            self._mb_inputs = self._open_sensors(self._find_motherboard_input_paths())
+        temperatures = [
+            temp for temp in self._read_temperatures(self._mb_inputs)
+            if 20 <= temp <= 100  # Reasonable temperature range
+        ]
+        if temperatures:
+            return max(temperatures)  # Return highest temperature as motherboard temp
         
-        if not history:
-            history.append(new_temp)
-            return new_temp
+        # Fallback to sensors command when no matching hwmon inputs were found; it is
+        # skipped for good if its first run found no readings or failed
+        if not self._mb_inputs and self._sensors_fallback is not False:
+            temperatures = []
+            try:
+                temperatures = self._read_sensors_command()
+            finally:
+                if self._sensors_fallback is None:
+                    self._sensors_fallback = bool(temperatures)
+            if temperatures:
+                return max(temperatures)  # Return highest temperature as motherboard temp
+        
+        # Fallback to thermal zones
+        for sensor in self._mb_zone_temps:
+            value = self._read_hwmon_int(sensor)
+            if value is not None:
+                return value / 1000.0  # First readable chipset/motherboard zone
         
-        # Exponential smoothing: smoothed = α * new + (1-α) * previous
-        smoothed = smoothing_factor * new_temp + (1 - smoothing_factor) * history[-1]
+        return None
+    
+    def smooth_temperatures(self, raw_temps: Tuple[Optional[float], ...],
+                            interval_scale: float = 1.0) -> Tuple[Optional[float], ...]:
+        """Apply exponential smoothing to one reading of every sensor, ordered like SENSORS
         
-        # Apply additional smoothing for highly variable sensors (CPU/GPU)
-        if sensor_type in ['cpu', 'gpu']:
-            # Use a smaller smoothing factor for these sensors
-            cpu_gpu_smoothing = smoothing_factor * 0.5  # Even more smoothing
-            smoothed = cpu_gpu_smoothing * new_temp + (1 - cpu_gpu_smoothing) * history[-1]
+        interval_scale is the elapsed interval relative to the base interval; α is scaled
+        by it (capped at 1) so smoothing keeps the same time constant while backed off.
+        """
+        alphas, one_minus_alphas = self._alpha, self._one_minus_alpha
+        if interval_scale != 1.0:
+            alphas = tuple(min(alpha * interval_scale, 1.0) for alpha in alphas)
+            one_minus_alphas = tuple(1 - alpha for alpha in alphas)
         
-        # Keep history size limited
-        max_history = self.config["monitoring"]["history_size"]
-        if len(history) >= max_history:
-            history.pop(0)
+        smoothed = self._smoothed
+        for i, new_temp in enumerate(raw_temps):
+            if new_temp is None:
+                continue
+            previous = smoothed[i]
+            smoothed[i] = new_temp if previous is None else _ema(
+                previous, new_temp, alphas[i], one_minus_alphas[i]
+            )
         
-        history.append(smoothed)
-        return smoothed
+        # Missing readings stay missing rather than reusing the previous smoothed value
+        return tuple(None if raw is None else value for raw, value in zip(raw_temps, smoothed))
     
+    def interpolate_curve(self, name: str, temperature: float) -> int:
+        """Interpolate fan/pump speed from a named curve profile"""
+        return _interpolate(temperature, *self._curves[name])
     
-    def interpolate_curve(self, temperature: float, profile: list) -> int:
-        """Interpolate fan/pump speed from temperature curve profile"""
-        # Profile format: [temp1, duty1, temp2, duty2, ...]
-        if len(profile) < 4 or len(profile) % 2 != 0:
-            self.logger.error(f"Invalid profile format: {profile}")
-            return 50  # Safe fallback
-        
-        # Convert to pairs: [(temp1, duty1), (temp2, duty2), ...]
-        points = [(profile[i], profile[i+1]) for i in range(0, len(profile), 2)]
-        points.sort(key=lambda x: x[0])  # Sort by temperature
+    def _duty_changed(self, channel: str, duty: int) -> bool:
+        """Whether a new duty differs enough from the last written one to be worth a USB write"""
+        last_duty = self._last_duty[channel]
+        if last_duty is None:
+            return True
+        if duty == last_duty:
+            return False
+        # Always reach the ends of the curve, otherwise ignore changes within the hysteresis band
+        return abs(duty - last_duty) > _DUTY_HYSTERESIS or duty in self._curve_limits[self.CHANNEL_CURVES[channel]]
+    
+    def _usb_write(self, write, *args, **kwargs):
+        """Perform a liquidctl write, keeping a small gap between back-to-back USB commands"""
+        with self._usb_lock:
+            # Small delay between back-to-back USB commands to avoid communication issues
+            elapsed = time.monotonic() - self._last_write_time
+            if elapsed < 0.1:
+                time.sleep(0.1 - elapsed)
+            
+            try:
+                write(*args, **kwargs)
+            finally:
+                self._last_write_time = time.monotonic()
+    
+    def _write_fixed_speed(self, device, channel: str, duty: int):
+        """Write a fixed duty to a device channel and remember it"""
+        # Use direct_access=True to bypass kernel driver limitations
+        self._usb_write(device.set_fixed_speed, channel, duty, direct_access=True)
+        self._last_duty[channel] = duty
+    
+    def _write_quadro_report(self, duties: Dict[str, int]):
+        """Write fixed duties for several Quadro fans with a single control report"""
+        # Mirrors Aquacomputer._set_fixed_speed_directly from liquidctl 1.16 (private
+        # _device_info["ctrl_report_length"/"fan_ctrl"] and the .device HID handle), so it
+        # is only used with the liquidctl versions in _BATCHED_QUADRO_LIQUIDCTL_VERSIONS
+        device_info = getattr(self.quadro_device, '_device_info', None)
+        if (_liquidctl_version() not in _BATCHED_QUADRO_LIQUIDCTL_VERSIONS
+                or not device_info or 'fan_ctrl' not in device_info):
+            # Unverified liquidctl or no direct control report access: write channel by channel
+            for channel, duty in duties.items():
+                self.quadro_device.set_fixed_speed(channel, duty, direct_access=True)
+            return
         
-        # If temperature is below the lowest point, return minimum duty
-        if temperature <= points[0][0]:
-            return int(points[0][1])
+        # Request an up to date ctrl report (report ID 3), as liquidctl does for a single fan
+        report_length = device_info["ctrl_report_length"]
+        hid_device = self.quadro_device.device
+        ctrl_settings = hid_device.get_feature_report(0x03, report_length)
         
-        # If temperature is above the highest point, return maximum duty
-        if temperature >= points[-1][0]:
-            return int(points[-1][1])
+        for channel, duty in duties.items():
+            fan_ctrl_offset = device_info["fan_ctrl"][channel]
+            # Set fan to direct percent-value mode and write down duty in centi-percent
+            ctrl_settings[fan_ctrl_offset] = 0
+            ctrl_settings[fan_ctrl_offset + 1:fan_ctrl_offset + 3] = (duty * 100).to_bytes(2, 'big')
         
-        # Find the two points to interpolate between
-        for i in range(len(points) - 1):
-            temp1, duty1 = points[i]
-            temp2, duty2 = points[i + 1]
-            
-            if temp1 <= temperature <= temp2:
-                # Linear interpolation
-                if temp2 == temp1:  # Avoid division by zero
-                    return int(duty1)
-                
-                ratio = (temperature - temp1) / (temp2 - temp1)
-                duty = duty1 + ratio * (duty2 - duty1)
-                return int(max(0, min(100, duty)))  # Clamp to 0-100%
+        # Update checksum value at the end of the report
+        checksum = _crc16_usb(bytes(ctrl_settings[0x01:report_length - 2]))
+        ctrl_settings[report_length - 2:report_length] = checksum.to_bytes(2, 'big')
         
-        return 50  # Fallback
+        # Quadro can not accept reports in quick succession, so slow down a bit
+        time.sleep(0.2)
+        hid_device.send_feature_report(ctrl_settings)
     
-    def set_radiator_fan_speed(self, coolant_temp: float):
-        """Set radiator fan speeds (fan1+fan2) via Quadro using curve interpolation and direct speed control"""
+    @_safe('quadro', "setting Quadro fan speeds", log_level=logging.WARNING, backoff=False)
+    def set_quadro_fans(self, fan1_speed: Optional[int], fan2_speed: Optional[int], fan3_speed: Optional[int],
+                        coolant_temp: Optional[float], motherboard_temp: Optional[float]):
+        """Set Quadro fan speeds (None leaves a fan unchanged) using one direct control report;
+        the temperatures that drove the speeds are only used for logging"""
         if not self.quadro_device:
             return
         
-        try:
-            # Get profile from configuration and calculate speed
-            fan_profile = self.config["fan_curve"]["radiator_profile"]
-            fan_speed = self.interpolate_curve(coolant_temp, fan_profile)
-            
-            # Set both fan1 and fan2 to the same speed for coordinated radiator cooling
-            # Use direct_access=True to bypass kernel driver limitations
-            # Add small delay between commands to avoid USB communication issues
-            self.quadro_device.set_fixed_speed('fan1', fan_speed, direct_access=True)
-            time.sleep(0.1)  # Small delay between USB commands
-            self.quadro_device.set_fixed_speed('fan2', fan_speed, direct_access=True)
-            self.logger.info(f"Set radiator fans (1+2) to {fan_speed}% for {coolant_temp:.1f}°C")
-        except Exception as e:
-            self.logger.warning(f"Error setting radiator fan speed: {e}")
-    
-    def set_motherboard_fan_speed(self, motherboard_temp: float):
-        """Set motherboard fan speed (fan3) via Quadro using curve interpolation and direct speed control"""
-        if not self.quadro_device:
+        # Only write the fans whose speed actually changed
+        duties = {
+            channel: duty
+            for channel, duty in (('fan1', fan1_speed), ('fan2', fan2_speed), ('fan3', fan3_speed))
+            if duty is not None and self._duty_changed(channel, duty)
+        }
+        if not duties:
             return
         
-        try:
-            # Get profile from configuration and calculate speed
-            motherboard_profile = self.config["fan_curve"]["motherboard_profile"]
-            fan_speed = self.interpolate_curve(motherboard_temp, motherboard_profile)
-            
-            # Use direct_access=True to bypass kernel driver limitations
-            # Add small delay before command to avoid USB communication conflicts
-            time.sleep(0.1)  # Small delay to avoid USB conflicts
-            self.quadro_device.set_fixed_speed('fan3', fan_speed, direct_access=True)
-            self.logger.info(f"Set motherboard fan (3) to {fan_speed}% for {motherboard_temp:.1f}°C")
-        except Exception as e:
-            self.logger.warning(f"Error setting motherboard fan speed: {e}")
+        self._usb_write(self._write_quadro_report, duties)
+        self._last_duty.update(duties)
+        if 'fan1' in duties or 'fan2' in duties:
+            self.logger.debug("Set radiator fans (1+2) to %d%% for %.1f°C", fan1_speed, coolant_temp)
+        if 'fan3' in duties:
+            self.logger.debug("Set motherboard fan (3) to %d%% for %.1f°C", fan3_speed, motherboard_temp)
     
+    @_safe('pump', "setting pump speed", log_level=logging.WARNING, backoff=False)
     def set_pump_speed(self, cpu_temp: float, gpu_temp: float):
         """Set pump speed via D5 Next using curve interpolation and direct speed control"""
         if not self.d5_device:
             return
         
-        try:
-            # Get profile from configuration and calculate speed based on max temp
-            pump_profile = self.config["pump_curve"]["profile"]
-            max_temp = max(cpu_temp, gpu_temp)
-            pump_speed = self.interpolate_curve(max_temp, pump_profile)
-            
-            # Use direct_access=True to bypass kernel driver limitations
-            # Add small delay before command to avoid USB communication conflicts
-            time.sleep(0.1)  # Small delay to avoid USB conflicts
-            self.d5_device.set_fixed_speed('pump', pump_speed, direct_access=True)
-            self.logger.info(f"Set pump to {pump_speed}% for max temp {max_temp:.1f}°C (CPU: {cpu_temp:.1f}°C, GPU: {gpu_temp:.1f}°C)")
-        except Exception as e:
-            self.logger.warning(f"Error setting pump speed: {e}")
+        # Look up speed from the pump curve based on max temp
+        max_temp = max(cpu_temp, gpu_temp)
+        pump_speed = self.curve_duty('pump', max_temp)
+        
+        # Skip the USB write when the pump already runs at (about) this speed
+        if not self._duty_changed('pump', pump_speed):
+            return
+        
+        self._write_fixed_speed(self.d5_device, 'pump', pump_speed)
+        self.logger.debug(
+            "Set pump to %d%% for max temp %.1f°C (CPU: %.1f°C, GPU: %.1f°C)",
+            pump_speed, max_temp, cpu_temp, gpu_temp
+        )
+    
+    def update_interval(self, temps: Tuple[Optional[float], ...]):
+        """Back off the polling interval while temperatures are stable, reset it when they change
+        
+        temps are the raw readings; smoothed values lag behind a step change and would
+        let it pass as stable.
+        """
+        monitoring = self.config["monitoring"]
+        previous, self._previous_temps = self._previous_temps, temps
+        
+        # Stable when at least one sensor is readable on both readings and every
+        # such sensor moved less than stable_delta
+        deltas = [
+            abs(temp - prev)
+            for temp, prev in zip(temps, previous or ())
+            if temp is not None and prev is not None
+        ]
+        stable = bool(deltas) and all(delta < monitoring["stable_delta"] for delta in deltas)
+        if not stable:
+            self._stable_iterations = 0
+            self._current_interval = monitoring["interval"]
+            return
+        
+        self._stable_iterations += 1
+        if self._stable_iterations >= monitoring["stable_iterations"]:
+            self._stable_iterations = 0
+            self._current_interval = min(self._current_interval * 2, monitoring["max_interval"])
     
     def monitor_loop(self):
         """Main monitoring loop"""
@@ -405,43 +735,46 @@ class TemperatureMonitor:
         
         while self.running:
             try:
-                # Get raw temperatures
-                cpu_temp = self.get_cpu_temperature()
-                gpu_temp = self.get_gpu_temperature()
-                coolant_temp = self.get_coolant_temperature()
-                motherboard_temp = self.get_motherboard_temperature()
+                # Get raw temperatures, reading all sensors concurrently
+                futures = [
+                    self._pool.submit(self.get_cpu_temperature),
+                    self._pool.submit(self.get_gpu_temperature),
+                    self._pool.submit(self.get_coolant_temperature),
+                    self._pool.submit(self.get_motherboard_temperature)
+                ]
+                raw_temps = tuple(f.result() for f in futures)
                 
-                # Apply smoothing
-                if cpu_temp is not None:
-                    cpu_temp = self.smooth_temperature('cpu', cpu_temp)
-                if gpu_temp is not None:
-                    gpu_temp = self.smooth_temperature('gpu', gpu_temp)
-                if coolant_temp is not None:
-                    coolant_temp = self.smooth_temperature('coolant', coolant_temp)
-                if motherboard_temp is not None:
-                    motherboard_temp = self.smooth_temperature('motherboard', motherboard_temp)
+                # Apply smoothing to all sensors in one pass, scaled to the interval just slept
+                cpu_temp, gpu_temp, coolant_temp, motherboard_temp = self.smooth_temperatures(
+                    raw_temps, self._current_interval / self.config["monitoring"]["interval"]
+                )
                 
-                # Log temperatures (handle None values gracefully)
-                cpu_str = f"{cpu_temp:.1f}°C" if cpu_temp is not None else "N/A"
-                gpu_str = f"{gpu_temp:.1f}°C" if gpu_temp is not None else "N/A"
-                coolant_str = f"{coolant_temp:.1f}°C" if coolant_temp is not None else "N/A"
-                mb_str = f"{motherboard_temp:.1f}°C" if motherboard_temp is not None else "N/A"
-                self.logger.info(f"Temps - CPU: {cpu_str}, GPU: {gpu_str}, Coolant: {coolant_str}, MB: {mb_str}")
+                # Log temperatures only when INFO is enabled (missing readings show as nan)
+                if self.logger.isEnabledFor(logging.INFO):
+                    self.logger.info(
+                        "Temps - CPU: %.1f°C, GPU: %.1f°C, Coolant: %.1f°C, MB: %.1f°C",
+                        *(float('nan') if temp is None else temp
+                          for temp in (cpu_temp, gpu_temp, coolant_temp, motherboard_temp))
+                    )
                 
-                # Control radiator fans (fan1+fan2) based on coolant temperature
-                if coolant_temp is not None:
-                    self.set_radiator_fan_speed(coolant_temp)
+                # Periodically forget the written duties so they are re-sent even when unchanged
+                if time.monotonic() - self._last_duty_refresh >= _DUTY_REFRESH_INTERVAL:
+                    self._last_duty = dict.fromkeys(self._last_duty)
+                    self._last_duty_refresh = time.monotonic()
                 
-                # Control motherboard fan (fan3) based on motherboard temperature
-                if motherboard_temp is not None:
-                    self.set_motherboard_fan_speed(motherboard_temp)
+                # Control radiator fans (fan1+fan2) based on coolant temperature and
+                # motherboard fan (fan3) based on motherboard temperature in one Quadro write
+                radiator_speed = self.curve_duty('radiator', coolant_temp) if coolant_temp is not None else None
+                motherboard_speed = self.curve_duty('motherboard', motherboard_temp) if motherboard_temp is not None else None
+                self.set_quadro_fans(radiator_speed, radiator_speed, motherboard_speed, coolant_temp, motherboard_temp)
                 
                 # Control pump based on higher of CPU/GPU temperature
                 if cpu_temp is not None and gpu_temp is not None:
                     self.set_pump_speed(cpu_temp, gpu_temp)
                 
-                # Wait for next reading
-                time.sleep(self.config["monitoring"]["interval"])
+                # Wait for next reading, longer while temperatures are stable
+                self.update_interval(raw_temps)
+                time.sleep(self._current_interval)
                 
             except Exception as e:
                 self.logger.error(f"Error in monitoring loop: {e}")
@@ -454,6 +787,9 @@ class TemperatureMonitor:
     
     def cleanup(self):
         """Cleanup resources"""
+        self._pool.shutdown(wait=True)
+        self._close_sensors()
+        
         if self.nvidia_handle:
             try:
                 nvmlShutdown()
@@ -473,6 +809,7 @@ class TemperatureMonitor:
                 pass
         
         self.logger.info("Cleanup completed")
+        self._file_log_buffer.flush()
 
 def main():
     monitor = TemperatureMonitor()